@@ -1 +1,4 @@
+from ._async import AsyncIntervalTree, QueryStats
+from ._bin_index import BinIndexEngine
+from ._binned import get_bin_edges, get_binned_counts, get_binned_coverage
 from ._tree import IntervalTree
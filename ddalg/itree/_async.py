@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import numbers
+import typing
+
+from ddalg.model import Interval
+from ._tree import IntervalTree
+
+
+class QueryStats:
+    """Counters of the queries answered by `AsyncIntervalTree`."""
+
+    def __init__(self):
+        self.queries = 0
+        self.batches = 0
+        self.largest_batch = 0
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.queries / self.batches if self.batches else 0.
+
+    def __repr__(self):
+        return "QueryStats(queries={}, batches={}, largest_batch={})".format(self.queries, self.batches,
+                                                                             self.largest_batch)
+
+
+class AsyncIntervalTree:
+    """
+    Asyncio front-end of `IntervalTree`. The queries that arrive within `max_latency` seconds are coalesced into
+    a batch that is sorted and answered in an executor, hence the event loop is not blocked by the queries.
+    The positions and the coordinates of the batch are answered by `IntervalTree.search_sorted`
+    and `IntervalTree.get_overlaps_sorted`, respectively.
+    """
+
+    def __init__(self, tree: IntervalTree, max_batch_size=256, max_latency=.001, executor=None):
+        """
+        Wrap the tree.
+        :param tree: tree to be queried, the tree must not be modified while queries are pending
+        :param max_batch_size: the batch is submitted as soon as it has this number of queries
+        :param max_latency: number of seconds to wait for more queries before submitting the batch
+        :param executor: executor for answering the batches, the default executor of the loop is used if `None`
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be positive but was `{}`".format(max_batch_size))
+        if max_latency < 0:
+            raise ValueError("max_latency must not be negative but was `{}`".format(max_latency))
+        self._tree = tree
+        self._max_batch_size = max_batch_size
+        self._max_latency = max_latency
+        self._executor = executor
+        self._pending = []  # list of (query, future) tuples
+        self._flush_handle = None
+        self._stats = QueryStats()
+        self._logger = logging.getLogger(__name__)
+
+    @property
+    def stats(self) -> QueryStats:
+        return self._stats
+
+    async def search(self, position: numbers.Number) -> typing.List[Interval]:
+        """
+        Return intervals that overlap with given `position`.
+        :param position: 1-based numeric position
+        :return: list of overlapping intervals
+        """
+        if not isinstance(position, numbers.Number):
+            raise ValueError("Expected a number but `{}` is `{}`".format(position, type(position)))
+        return await self._submit(position)
+
+    async def get_overlaps(self, begin, end) -> typing.List[Interval]:
+        """
+        Get intervals that overlap with given query coordinates.
+        :param begin: 0-based (excluded) begin position of query
+        :param end: 0-based (included) end position of query
+        :return: list (not necessarily sorted) with intervals overlapping with query coordinates
+        """
+        for coordinate in (begin, end):
+            if not isinstance(coordinate, numbers.Number):
+                raise ValueError("Expected a number but `{}` is `{}`".format(coordinate, type(coordinate)))
+        return await self._submit((begin, end))
+
+    def flush(self):
+        """
+        Submit the pending queries without waiting for more queries.
+        :return: None
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        self._stats.queries += len(batch)
+        self._stats.batches += 1
+        self._stats.largest_batch = max(self._stats.largest_batch, len(batch))
+        self._logger.debug("Submitting batch of {} queries".format(len(batch)))
+
+        self._tree.build()  # rebuild, if necessary, on the loop thread rather than in the executor
+        loop = asyncio.get_event_loop()
+        result = loop.run_in_executor(self._executor, self._answer, [query for query, _ in batch])
+        result.add_done_callback(lambda done: self._resolve(batch, done))
+
+    def _submit(self, query) -> asyncio.Future:
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        self._pending.append((query, future))
+        if len(self._pending) >= self._max_batch_size:
+            self.flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self._max_latency, self.flush)
+        return future
+
+    def _answer(self, queries: typing.List) -> typing.List:
+        # each query gets either its results or the exception raised while answering it
+        results = [None] * len(queries)
+
+        # positions are answered in a single walk through the tree, or one by one to find the failing queries
+        positions = [idx for idx, query in enumerate(queries) if not isinstance(query, tuple)]
+        try:
+            positions.sort(key=queries.__getitem__)
+            for idx, overlaps in zip(positions, self._tree.search_sorted([queries[idx] for idx in positions])):
+                results[idx] = overlaps
+        except Exception:
+            for idx in positions:
+                results[idx] = _call(self._tree.search, queries[idx])
+
+        # coordinates are answered in a single walk through the tree, or one by one to find the failing queries
+        coordinates = [idx for idx, query in enumerate(queries) if isinstance(query, tuple)]
+        try:
+            coordinates.sort(key=queries.__getitem__)
+            for idx, overlaps in zip(coordinates,
+                                     self._tree.get_overlaps_sorted([queries[idx] for idx in coordinates])):
+                results[idx] = overlaps
+        except Exception:
+            for idx in coordinates:
+                results[idx] = _call(self._tree.get_overlaps, *queries[idx])
+
+        return results
+
+    @staticmethod
+    def _resolve(batch, done: asyncio.Future):
+        if done.cancelled():
+            for _, future in batch:
+                future.cancel()
+            return
+        if done.exception() is not None:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(done.exception())
+            return
+        for (_, future), result in zip(batch, done.result()):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+def _call(func, *args):
+    # return the exception rather than raise it, so that it fails only the query being answered
+    try:
+        return func(*args)
+    except Exception as e:
+        return e
@@ -0,0 +1,179 @@
+import math
+import numbers
+import typing
+
+import numpy as np
+
+from ddalg.model import Interval
+
+# the largest coordinate supported by the binning scheme
+MAX_COORDINATE = 1 << 29
+# (bit shift, first bin id) of the bin levels, from the smallest 16 kb bins to the largest 64 Mb bins, the bin `0`
+# spans all coordinates
+_LEVELS = ((14, 4681), (17, 585), (20, 73), (23, 9), (26, 1))
+
+
+class BinIndexEngine:
+    """
+    Engine that assigns each interval to the smallest enclosing bin of the UCSC/tabix hierarchical binning scheme.
+    The coordinates are stored in compact arrays sorted by bin and begin coordinate, along with the index of each
+    interval in the list the engine was created from, hence the engine has a much smaller memory footprint than
+    the centered tree. The engine supports non-negative integer coordinates up to `2^29`, the begin coordinate must be
+    smaller than `2^29`.
+    """
+
+    def __init__(self, intervals: typing.List[Interval]):
+        self._intervals = list(intervals)
+        begins, ends = _get_coordinates(self._intervals)
+        self._set_arrays(*_make_arrays(self._intervals, begins, ends))
+
+    @classmethod
+    def load(cls, file, intervals: typing.List[Interval]) -> 'BinIndexEngine':
+        """
+        Load the engine stored by `save` without binning the intervals again. The coordinates of the intervals are
+        checked against the stored coordinates.
+        :param file: path or file-like object
+        :param intervals: the intervals of the stored engine, in the same order as when the engine was created
+        :return: the engine
+        """
+        engine = cls.__new__(cls)
+        engine._intervals = list(intervals)
+        with np.load(file) as data:
+            engine._set_arrays(data['bins'], data['offsets'], data['begins'], data['ends'], data['order'])
+        if len(engine._intervals) != len(engine._order):
+            raise ValueError("Expected {} intervals but got {}".format(len(engine._order), len(engine._intervals)))
+        begins, ends = _get_coordinates(engine._intervals)
+        mismatch = np.flatnonzero((begins[engine._order] != engine._begins) | (ends[engine._order] != engine._ends))
+        if len(mismatch):
+            idx = engine._order[mismatch[0]]
+            raise ValueError("Interval #{} `{}` does not match the stored coordinates {}-{}".format(
+                idx, engine._intervals[idx], engine._begins[mismatch[0]], engine._ends[mismatch[0]]))
+        return engine
+
+    def save(self, file):
+        """
+        Store the bin arrays and the coordinates of the intervals into a NumPy `.npz` file.
+        :param file: path or file-like object
+        :return: None
+        """
+        np.savez(file, bins=self._bins, offsets=self._offsets, begins=self._begins, ends=self._ends, order=self._order)
+
+    def search(self, position: numbers.Number) -> typing.List[Interval]:
+        """
+        Return intervals that overlap with given `position`.
+        :param position: 1-based numeric position
+        :return: list of overlapping intervals
+        """
+        if not isinstance(position, numbers.Number):
+            raise ValueError("Expected a number but `{}` is `{}`".format(position, type(position)))
+        base = math.ceil(position) - 1
+        idx = self._candidates(base, base + 1)
+        mask = (self._begins[idx] < position) & (self._ends[idx] >= position)
+        return self._to_intervals(idx[mask])
+
+    def get_overlaps(self, begin: numbers.Number, end: numbers.Number) -> typing.List[Interval]:
+        """
+        Return intervals that overlap with given `begin` and `end` coordinates.
+        :param begin: 0-based (excluded) begin coordinate
+        :param end: 0-based (included) end coordinate
+        :return: list of overlapping intervals
+        """
+        idx = self._candidates(math.floor(begin), max(math.ceil(end), math.floor(begin) + 1))
+        mask = (self._begins[idx] < end) & (self._ends[idx] > begin)
+        return self._to_intervals(idx[mask])
+
+    def get_contained(self, begin: numbers.Number, end: numbers.Number) -> typing.List[Interval]:
+        """
+        Return intervals that are contained within given `begin` and `end` coordinates.
+        :param begin: 0-based (excluded) begin coordinate
+        :param end: 0-based (included) end coordinate
+        :return: list of contained intervals
+        """
+        idx = self._candidates(math.floor(begin), math.ceil(end) + 1)
+        mask = (self._begins[idx] >= begin) & (self._ends[idx] <= end)
+        return self._to_intervals(idx[mask])
+
+    def get_enclosing(self, begin: numbers.Number, end: numbers.Number) -> typing.List[Interval]:
+        """
+        Return intervals that enclose given `begin` and `end` coordinates.
+        :param begin: 0-based (excluded) begin coordinate
+        :param end: 0-based (included) end coordinate
+        :return: list of enclosing intervals
+        """
+        idx = self._candidates(math.floor(begin) - 1, math.ceil(end) + 1)
+        mask = (self._begins[idx] <= begin) & (self._ends[idx] >= end)
+        return self._to_intervals(idx[mask])
+
+    def _set_arrays(self, bins, offsets, begins, ends, order):
+        self._bins, self._offsets = bins, offsets
+        self._begins, self._ends, self._order = begins, ends, order
+
+    def _candidates(self, begin: int, end: int) -> np.ndarray:
+        # get indices of the intervals in bins that overlap with 0-based half-open region [begin, end), the intervals
+        # begin before `end`
+        begin, end = max(begin, 0), min(end, MAX_COORDINATE)
+        if begin >= end or not len(self._bins):
+            return np.empty(0, dtype=np.int64)
+
+        bins = _region_to_bins(begin, end)
+        positions = np.searchsorted(self._bins, bins)
+        present = positions < len(self._bins)
+        present[present] = self._bins[positions[present]] == bins[present]
+
+        slices = []
+        for pos in positions[present]:
+            first, last = self._offsets[pos], self._offsets[pos + 1]
+            # intervals of the bin are sorted by begin coordinate
+            last = first + np.searchsorted(self._begins[first:last], end, side='left')
+            slices.append(np.arange(first, last))
+        return np.concatenate(slices) if slices else np.empty(0, dtype=np.int64)
+
+    def _to_intervals(self, idx: np.ndarray) -> typing.List[Interval]:
+        # position sorted intervals, the intervals with equal coordinates keep their order
+        hits = self._order[idx]
+        return [self._intervals[i] for i in hits[np.lexsort((hits, self._ends[idx], self._begins[idx]))]]
+
+
+def _get_coordinates(intervals: typing.List[Interval]) -> typing.Tuple[np.ndarray, np.ndarray]:
+    if any(not isinstance(interval.begin, numbers.Integral) or not isinstance(interval.end, numbers.Integral)
+           for interval in intervals):
+        raise ValueError("Coordinates must be integers")
+    begins = np.array([interval.begin for interval in intervals], dtype=np.int64)
+    ends = np.array([interval.end for interval in intervals], dtype=np.int64)
+    return begins, ends
+
+
+def _make_arrays(intervals, begins: np.ndarray, ends: np.ndarray):
+    # the begin must be below the maximum, since even an empty interval is binned as the region [begin, begin + 1)
+    if len(intervals) and (begins.min() < 0 or begins.max() >= MAX_COORDINATE or ends.max() > MAX_COORDINATE
+                           or np.any(ends < begins)):
+        raise ValueError("Coordinates must be in range [0, {}] with begin <= end and begin < {}".format(
+            MAX_COORDINATE, MAX_COORDINATE))
+
+    bins = _region_to_bin(begins, np.maximum(ends, begins + 1))
+    order = np.lexsort((begins, bins))
+    bins = bins[order]
+    unique_bins, counts = np.unique(bins, return_counts=True)
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+    return unique_bins, offsets, begins[order], ends[order], order
+
+
+def _region_to_bin(begins: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    # get the smallest bin that encloses each 0-based half-open region [begin, end)
+    last = ends - 1
+    bins = np.zeros(len(begins), dtype=np.int64)
+    assigned = np.zeros(len(begins), dtype=bool)
+    for shift, first_bin in _LEVELS:
+        same = ~assigned & ((begins >> shift) == (last >> shift))
+        bins[same] = first_bin + (begins[same] >> shift)
+        assigned |= same
+    return bins
+
+
+def _region_to_bins(begin: int, end: int) -> np.ndarray:
+    # get all bins that overlap with 0-based half-open region [begin, end), the bins are sorted
+    last = end - 1
+    bins = [np.zeros(1, dtype=np.int64)]
+    for shift, first_bin in reversed(_LEVELS):
+        bins.append(np.arange(first_bin + (begin >> shift), first_bin + (last >> shift) + 1, dtype=np.int64))
+    return np.concatenate(bins)
@@ -0,0 +1,90 @@
+import numbers
+import typing
+
+import numpy as np
+
+
+def get_bin_edges(begin: numbers.Number, end: numbers.Number, bin_size: numbers.Number) -> np.ndarray:
+    """
+    Get edges of fixed-size bins that span given region. The last bin is shorter if the region length is not
+    a multiple of `bin_size`.
+    :param begin: 0-based (excluded) begin coordinate of the region
+    :param end: 0-based (included) end coordinate of the region
+    :param bin_size: positive bin size
+    :return: array with `n+1` edges of `n` bins, the `i`-th bin spans coordinates `(edges[i], edges[i+1]]`
+    """
+    if bin_size <= 0:
+        raise ValueError("bin_size must be positive but was `{}`".format(bin_size))
+    if end <= begin:
+        raise ValueError("end `{}` must be greater than begin `{}`".format(end, begin))
+    return np.append(np.arange(begin, end, bin_size), end)
+
+
+def get_binned_counts(begins, ends, begin, end, bin_size, weights=None) -> typing.Tuple[np.ndarray, np.ndarray]:
+    """
+    Count intervals that overlap with fixed-size bins spanning given region.
+    :param begins: array-like with 0-based (excluded) begin coordinates of the intervals
+    :param ends: array-like with 0-based (included) end coordinates of the intervals
+    :param begin: 0-based (excluded) begin coordinate of the region
+    :param end: 0-based (included) end coordinate of the region
+    :param bin_size: positive bin size
+    :param weights: optional array-like with interval weights to be summed instead of counting the intervals
+    :return: a tuple with array of `n` counts and array with `n+1` bin edges
+    """
+    begins, ends, weights = _check_arrays(begins, ends, weights)
+    edges = get_bin_edges(begin, end, bin_size)
+    n_bins = len(edges) - 1
+
+    # an interval overlaps bins `first..last` (inclusive), the interval does not overlap any bin if `first > last`
+    first = np.searchsorted(edges[1:], begins, side='right')
+    last = np.searchsorted(edges[:-1], ends, side='left') - 1
+    mask = first <= last
+    w = None if weights is None else weights[mask]
+
+    # difference array with +weight at the first bin and -weight past the last bin
+    diff = np.bincount(first[mask], weights=w, minlength=n_bins + 1) \
+        - np.bincount(last[mask] + 1, weights=w, minlength=n_bins + 1)
+    return np.cumsum(diff[:n_bins]), edges
+
+
+def get_binned_coverage(begins, ends, begin, end, bin_size, weights=None) -> typing.Tuple[np.ndarray, np.ndarray]:
+    """
+    Sum bases of the intervals that overlap with fixed-size bins spanning given region.
+    :param begins: array-like with 0-based (excluded) begin coordinates of the intervals
+    :param ends: array-like with 0-based (included) end coordinates of the intervals
+    :param begin: 0-based (excluded) begin coordinate of the region
+    :param end: 0-based (included) end coordinate of the region
+    :param bin_size: positive bin size
+    :param weights: optional array-like with interval weights to multiply the overlapping bases with
+    :return: a tuple with array of `n` sums of overlapping bases and array with `n+1` bin edges
+    """
+    begins, ends, weights = _check_arrays(begins, ends, weights)
+    edges = get_bin_edges(begin, end, bin_size)
+    if weights is None:
+        weights = np.ones(len(begins))
+
+    # bases covered by the intervals up to the coordinate `x` is a piecewise linear function:
+    #   sum(w * (x - b) for b < x) - sum(w * (x - e) for e < x)
+    # bases in each bin are then obtained as difference of the function values at the bin edges
+    cumulative = _covered_before(begins, weights, edges) - _covered_before(ends, weights, edges)
+    return np.diff(cumulative), edges
+
+
+def _covered_before(coordinates: np.ndarray, weights: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    order = np.argsort(coordinates, kind='stable')
+    coordinates, weights = coordinates[order], weights[order]
+    cum_weights = np.concatenate(([0.], np.cumsum(weights)))
+    cum_moments = np.concatenate(([0.], np.cumsum(weights * coordinates)))
+    idx = np.searchsorted(coordinates, edges, side='left')
+    return edges * cum_weights[idx] - cum_moments[idx]
+
+
+def _check_arrays(begins, ends, weights):
+    begins, ends = np.asarray(begins), np.asarray(ends)
+    if begins.shape != ends.shape or begins.ndim != 1:
+        raise ValueError("begins and ends must be 1-dimensional arrays of the same length")
+    if weights is not None:
+        weights = np.asarray(weights, dtype=float)
+        if weights.shape != begins.shape:
+            raise ValueError("weights must have the same length as begins and ends")
+    return begins, ends, weights
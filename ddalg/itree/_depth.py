@@ -0,0 +1,79 @@
+import numbers
+
+import numpy as np
+
+
+class DepthIndex:
+    """
+    Index for answering the maximum number of simultaneously overlapping intervals within a region.
+
+    The interval coordinates split the line into elementary segments `(coordinates[i], coordinates[i+1]]` where
+    the number of overlapping intervals (depth) is constant. A segment tree of the segment depths allows to get
+    the maximum depth of any run of consecutive segments in logarithmic time. The tree is stored in a single `int32`
+    array with less than 4 items per segment, hence the memory of the index grows linearly with the number of intervals.
+    """
+
+    def __init__(self, begins, ends):
+        """
+        Create the index from interval coordinates.
+        :param begins: array-like with 0-based (excluded) begin coordinates of the intervals
+        :param ends: array-like with 0-based (included) end coordinates of the intervals
+        """
+        begins, ends = np.sort(np.asarray(begins)), np.sort(np.asarray(ends))
+        if begins.shape != ends.shape or begins.ndim != 1:
+            raise ValueError("begins and ends must be 1-dimensional arrays of the same length")
+        self._coordinates = np.unique(np.concatenate((begins, ends)))
+
+        # depth of the segment following each coordinate: intervals that began but did not end yet
+        bounds = self._coordinates[:-1]
+        depths = np.searchsorted(begins, bounds, side='right') - np.searchsorted(ends, bounds, side='right')
+
+        # `tree[size + i]` is the depth of segment `i`, `tree[i]` is the maximum of `tree[2i]` and `tree[2i + 1]`
+        self._n_segments = len(depths)
+        self._size = 1 << max(self._n_segments - 1, 0).bit_length()
+        self._tree = np.zeros(2 * self._size, dtype=np.int32)
+        self._tree[self._size:self._size + self._n_segments] = depths
+        level = self._size
+        while level > 1:
+            self._tree[level // 2:level] = np.maximum(self._tree[level:2 * level:2], self._tree[level + 1:2 * level:2])
+            level //= 2
+
+    def max_depth(self, begin: numbers.Number, end: numbers.Number) -> int:
+        """
+        Get the maximum number of simultaneously overlapping intervals within given coordinates.
+        :param begin: 0-based (excluded) begin coordinate
+        :param end: 0-based (included) end coordinate
+        :return: the maximum depth
+        """
+        return int(self.max_depth_batch([begin], [end])[0])
+
+    def max_depth_batch(self, begins, ends) -> np.ndarray:
+        """
+        Get the maximum number of simultaneously overlapping intervals within each of given coordinates.
+        :param begins: array-like with 0-based (excluded) begin coordinates
+        :param ends: array-like with 0-based (included) end coordinates
+        :return: array with the maximum depth for each query
+        """
+        begins, ends = np.asarray(begins), np.asarray(ends)
+        if begins.shape != ends.shape:
+            raise ValueError("begins and ends must have the same shape")
+        if np.any(ends <= begins):
+            raise ValueError("ends must be greater than begins")
+
+        # the query overlaps with segments `lo..hi-1`
+        lo = np.maximum(np.searchsorted(self._coordinates, begins, side='right') - 1, 0) + self._size
+        hi = np.minimum(np.searchsorted(self._coordinates, ends, side='left'), self._n_segments) + self._size
+
+        # walk all queries up the tree at once, taking the nodes at the borders of the ranges
+        results = np.zeros(begins.shape, dtype=np.int64)
+        active = lo < hi
+        while np.any(active):
+            left = active & (lo % 2 == 1)
+            results[left] = np.maximum(results[left], self._tree[lo[left]])
+            lo[left] += 1
+            right = active & (hi % 2 == 1)
+            hi[right] -= 1
+            results[right] = np.maximum(results[right], self._tree[hi[right]])
+            lo, hi = lo // 2, hi // 2
+            active = lo < hi
+        return results
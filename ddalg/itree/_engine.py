@@ -0,0 +1,194 @@
+import bisect
+import numbers
+import statistics
+import typing
+
+import numpy as np
+
+from ddalg.model import Interval
+from ._bin_index import MAX_COORDINATE, BinIndexEngine
+from ._node import IntervalNode
+
+# trees with at most this number of intervals are scanned linearly
+LINEAR_SCAN_MAX_SIZE = 64
+# trees with at least this number of mostly short intervals are stored in the compact bin index
+BIN_INDEX_MIN_SIZE = 100000
+# intervals not longer than the smallest bin of the bin index (16 kb) are considered to be short
+SHORT_MAX_LENGTH = 1 << 14
+# trees where each position is covered by at least this number of intervals on average are considered to be dense
+DENSE_MIN_DEPTH = 16.
+# sorted array is used only if its backward scans are at most this many times longer than the mean depth
+SORTED_MAX_SCAN_RATIO = 4.
+
+
+class LinearScanEngine:
+    """Engine that checks all intervals upon each query. The engine is the fastest option for tiny trees."""
+
+    def __init__(self, intervals: typing.List[Interval]):
+        self._intervals = sorted(intervals)
+
+    def search(self, position: numbers.Number) -> typing.List[Interval]:
+        """
+        Return intervals that overlap with given `position`.
+        :param position: 1-based numeric position
+        :return: list of overlapping intervals
+        """
+        if not isinstance(position, numbers.Number):
+            raise ValueError("Expected a number but `{}` is `{}`".format(position, type(position)))
+        return [interval for interval in self._intervals if interval.contains(position)]
+
+    def get_overlaps(self, begin: numbers.Number, end: numbers.Number) -> typing.List[Interval]:
+        """
+        Return intervals that overlap with given `begin` and `end` coordinates.
+        :param begin: 0-based (excluded) begin coordinate
+        :param end: 0-based (included) end coordinate
+        :return: list of overlapping intervals
+        """
+        return [interval for interval in self._intervals if interval.intersects(begin, end)]
+
+    def get_contained(self, begin: numbers.Number, end: numbers.Number) -> typing.List[Interval]:
+        """
+        Return intervals that are contained within given `begin` and `end` coordinates.
+        :param begin: 0-based (excluded) begin coordinate
+        :param end: 0-based (included) end coordinate
+        :return: list of contained intervals
+        """
+        return [interval for interval in self._intervals if begin <= interval.begin and interval.end <= end]
+
+    def get_enclosing(self, begin: numbers.Number, end: numbers.Number) -> typing.List[Interval]:
+        """
+        Return intervals that enclose given `begin` and `end` coordinates.
+        :param begin: 0-based (excluded) begin coordinate
+        :param end: 0-based (included) end coordinate
+        :return: list of enclosing intervals
+        """
+        return [interval for interval in self._intervals if interval.begin <= begin and end <= interval.end]
+
+
+class SortedArrayEngine:
+    """
+    Engine that keeps intervals sorted by begin coordinate along with the running maximum of the end coordinates.
+    The query scans the intervals that begin before the query end backwards until no preceding interval can reach
+    the query begin.
+    """
+
+    def __init__(self, intervals: typing.List[Interval]):
+        self._intervals = sorted(intervals)
+        self._begins = [interval.begin for interval in self._intervals]
+        self._max_ends = []
+        for interval in self._intervals:
+            self._max_ends.append(max(self._max_ends[-1], interval.end) if self._max_ends else interval.end)
+
+    def search(self, position: numbers.Number) -> typing.List[Interval]:
+        """
+        Return intervals that overlap with given `position`.
+        :param position: 1-based numeric position
+        :return: list of overlapping intervals
+        """
+        if not isinstance(position, numbers.Number):
+            raise ValueError("Expected a number but `{}` is `{}`".format(position, type(position)))
+        results = []
+        idx = bisect.bisect_left(self._begins, position) - 1
+        while idx >= 0 and self._max_ends[idx] >= position:
+            if self._intervals[idx].end >= position:
+                results.append(self._intervals[idx])
+            idx -= 1
+        results.reverse()
+        return results
+
+    def get_overlaps(self, begin: numbers.Number, end: numbers.Number) -> typing.List[Interval]:
+        """
+        Return intervals that overlap with given `begin` and `end` coordinates.
+        :param begin: 0-based (excluded) begin coordinate
+        :param end: 0-based (included) end coordinate
+        :return: list of overlapping intervals
+        """
+        results = []
+        idx = bisect.bisect_left(self._begins, end) - 1
+        while idx >= 0 and self._max_ends[idx] > begin:
+            if self._intervals[idx].end > begin:
+                results.append(self._intervals[idx])
+            idx -= 1
+        results.reverse()
+        return results
+
+    def get_contained(self, begin: numbers.Number, end: numbers.Number) -> typing.List[Interval]:
+        """
+        Return intervals that are contained within given `begin` and `end` coordinates.
+        :param begin: 0-based (excluded) begin coordinate
+        :param end: 0-based (included) end coordinate
+        :return: list of contained intervals
+        """
+        first, last = bisect.bisect_left(self._begins, begin), bisect.bisect_right(self._begins, end)
+        return [interval for interval in self._intervals[first:last] if interval.end <= end]
+
+    def get_enclosing(self, begin: numbers.Number, end: numbers.Number) -> typing.List[Interval]:
+        """
+        Return intervals that enclose given `begin` and `end` coordinates.
+        :param begin: 0-based (excluded) begin coordinate
+        :param end: 0-based (included) end coordinate
+        :return: list of enclosing intervals
+        """
+        results = []
+        idx = bisect.bisect_right(self._begins, begin) - 1
+        while idx >= 0 and self._max_ends[idx] >= end:
+            if self._intervals[idx].end >= end:
+                results.append(self._intervals[idx])
+            idx -= 1
+        results.reverse()
+        return results
+
+
+# engines available to `IntervalTree`
+ENGINES = {'tree': IntervalNode, 'sorted': SortedArrayEngine, 'linear': LinearScanEngine, 'binning': BinIndexEngine}
+
+
+def select_engine(intervals: typing.List[Interval]) -> typing.Tuple[str, str]:
+    """
+    Select engine that is likely to be the fastest for given intervals based on their count and length distribution.
+    :param intervals: list with intervals
+    :return: a tuple with engine name and a rationale for the choice
+    """
+    if len(intervals) <= LINEAR_SCAN_MAX_SIZE:
+        return 'linear', '{} intervals are scanned faster than traversed'.format(len(intervals))
+
+    lengths = [len(interval) for interval in intervals]
+    span = max(interval.end for interval in intervals) - min(interval.begin for interval in intervals)
+    depth = sum(lengths) / span if span > 0 else float('inf')
+    median_length = statistics.median(lengths)
+    if depth >= DENSE_MIN_DEPTH:
+        # a few long intervals make the running maximum of the end coordinates reach far back,
+        # making the sorted array scan many intervals that do not overlap with the query
+        scan = get_mean_scan_length(intervals)
+        if scan <= SORTED_MAX_SCAN_RATIO * depth:
+            return 'sorted', 'mean depth {:.2f} (median length {}, mean scan {:.2f}) favours sorted array'.format(
+                depth, median_length, scan)
+        return 'tree', 'mean depth {:.2f} with long-tailed lengths (max length {}, mean scan {:.2f}) ' \
+                       'favours centered tree'.format(depth, max(lengths), scan)
+
+    if len(intervals) >= BIN_INDEX_MIN_SIZE and median_length <= SHORT_MAX_LENGTH and _fits_bin_index(intervals):
+        return 'binning', '{} intervals with median length {} favour compact bin index'.format(
+            len(intervals), median_length)
+
+    return 'tree', 'mean depth {:.2f} (median length {}) favours centered tree'.format(depth, median_length)
+
+
+def get_mean_scan_length(intervals: typing.List[Interval]) -> float:
+    """
+    Get mean number of intervals scanned by `SortedArrayEngine` when querying the begin coordinates of the intervals.
+    :param intervals: list with intervals
+    :return: the mean scan length
+    """
+    begins = np.array([interval.begin for interval in intervals])
+    ends = np.array([interval.end for interval in intervals])
+    order = np.argsort(begins, kind='stable')
+    begins, max_ends = begins[order], np.maximum.accumulate(ends[order])
+    # the scan from the interval `i` goes back to the first interval whose running maximum end reaches its begin
+    first = np.searchsorted(max_ends, begins, side='right')
+    return float(np.mean(np.arange(len(begins)) - first)) if len(begins) else 0.
+
+
+def _fits_bin_index(intervals: typing.List[Interval]) -> bool:
+    return all(isinstance(interval.begin, numbers.Integral) and isinstance(interval.end, numbers.Integral)
+               and 0 <= interval.begin <= interval.end <= MAX_COORDINATE and interval.begin < MAX_COORDINATE
+               for interval in intervals)
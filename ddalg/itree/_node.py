@@ -1,10 +1,17 @@
+import bisect
 import numbers
 import statistics
 import typing
 from collections import OrderedDict, defaultdict
+from operator import attrgetter
+
+import numpy as np
 
 from ddalg.model import Interval
 
+# nodes with fewer intervals are built from the intervals rather than from the coordinate arrays by `from_sorted`
+SORTED_BUILD_MIN_SIZE = 16
+
 
 class IntervalNode:
 
@@ -17,6 +24,10 @@ class IntervalNode:
         self.parent = parent
         self.left = None
         self.right = None
+        self._keys = []
+        self._begins = []
+        self._by_end = []
+        self._center = None
 
         if len(intervals) == 0:
             return
@@ -38,12 +49,78 @@ class IntervalNode:
             self.intervals[interval] = []
             for item in inner[interval]:
                 self.intervals[interval].append(item)
+        self._keys = list(self.intervals)
+        self._begins = [interval.begin for interval in self._keys]
+        self._by_end = sorted(self._keys, key=attrgetter('end'), reverse=True)
 
         if left:
             self.left = IntervalNode(left, parent=self)
         if right:
             self.right = IntervalNode(right, parent=self)
 
+    @classmethod
+    def from_sorted(cls, intervals: typing.List[Interval]) -> 'IntervalNode':
+        """
+        Create a node from position sorted intervals, e.g. from the k-way merge of the sorted intervals of several
+        trees. The node is equal to the node created from the same list by the constructor.
+
+        The coordinates are read into NumPy arrays once. Each node keeps the begin coordinates of its intervals in
+        position order and the end coordinates in sorted order, and the order survives the partitioning into
+        the children. Hence the center of the node is the median of a linear merge of two sorted arrays rather than
+        of a set of coordinates, and only the intervals of the node buckets are visited in Python. Small nodes are
+        built by the constructor.
+        :param intervals: list with intervals sorted by begin and end coordinate
+        :return: the node
+        """
+        if not intervals:
+            return cls([])
+        begins = np.array([interval.begin for interval in intervals])
+        ends = np.array([interval.end for interval in intervals])
+        return cls._from_arrays(intervals, begins, ends, np.arange(len(intervals)), np.argsort(ends, kind='stable'))
+
+    @classmethod
+    def _from_arrays(cls, intervals: typing.List[Interval], begins: np.ndarray, ends: np.ndarray,
+                     by_begin: np.ndarray, by_end: np.ndarray, parent=None) -> 'IntervalNode':
+        # `by_begin` and `by_end` are indices of the node intervals sorted by position and by end coordinate
+        if len(by_begin) < SORTED_BUILD_MIN_SIZE:
+            return cls([intervals[idx] for idx in by_begin.tolist()], parent=parent)
+
+        # the same median as `statistics.median` of the set of coordinates, the stable sort merges the sorted runs
+        coordinates = np.sort(np.concatenate((begins[by_begin], ends[by_end])), kind='stable')
+        coordinates = coordinates[np.concatenate(([True], coordinates[1:] != coordinates[:-1]))]
+        mid = len(coordinates) // 2
+        if len(coordinates) % 2:
+            center = coordinates[mid].item()
+        else:
+            center = (coordinates[mid - 1].item() + coordinates[mid].item()) / 2
+
+        node = cls([], parent=parent)
+        node._center = center
+        in_left = ends[by_begin] < center
+        in_right = begins[by_begin] >= center
+
+        # the intervals with equal coordinates are adjacent in the position sorted order
+        inner = by_begin[~(in_left | in_right)]
+        inner_begins, inner_ends = begins[inner], ends[inner]
+        first = np.ones(len(inner), dtype=bool)
+        first[1:] = (inner_begins[1:] != inner_begins[:-1]) | (inner_ends[1:] != inner_ends[:-1])
+        bounds = np.append(np.flatnonzero(first), len(inner)).tolist()
+        inner = inner.tolist()
+        for start, stop in zip(bounds, bounds[1:]):
+            items = [intervals[idx] for idx in inner[start:stop]]
+            node.intervals[items[0]] = items
+        node._keys = list(node.intervals)
+        node._begins = [interval.begin for interval in node._keys]
+        node._by_end = sorted(node._keys, key=attrgetter('end'), reverse=True)
+
+        if in_left.any():
+            node.left = cls._from_arrays(intervals, begins, ends, by_begin[in_left],
+                                         by_end[ends[by_end] < center], parent=node)
+        if in_right.any():
+            node.right = cls._from_arrays(intervals, begins, ends, by_begin[in_right],
+                                          by_end[begins[by_end] >= center], parent=node)
+        return node
+
     def search(self, position: numbers.Number) -> typing.List[Interval]:
         """
         Return intervals that overlap with given `position`.
@@ -54,7 +131,7 @@ class IntervalNode:
             raise ValueError("Expected a number but `{}` is `{}`".format(position, type(position)))
         results = []
 
-        if not self.intervals:
+        if self._center is None:
             # empty tree
             return results
 
@@ -82,7 +159,7 @@ class IntervalNode:
         """
         results = []
 
-        if not self.intervals:
+        if self._center is None:
             # empty tree
             return results
 
@@ -102,6 +179,85 @@ class IntervalNode:
 
         return results
 
+    def get_contained(self, begin: numbers.Number, end: numbers.Number) -> typing.List[Interval]:
+        """
+        Return intervals that are contained within given `begin` and `end` coordinates.
+        :param begin: 0-based (excluded) begin coordinate
+        :param end: 0-based (included) end coordinate
+        :return: list of contained intervals
+        """
+        results = []
+
+        if self._center is None:
+            # empty tree
+            return results
+
+        # intervals of the node contain the center, the center must be within the query
+        if begin < self._center <= end:
+            for idx in range(bisect.bisect_left(self._begins, begin), len(self._keys)):
+                entry = self._keys[idx]
+                if entry.begin > end:
+                    break
+                if entry.end <= end:
+                    for item in self.intervals[entry]:
+                        results.append(item)
+
+        # intervals of the left subtree end before the center, intervals of the right subtree begin after the center
+        if begin < self._center and self.left:
+            for item in self.left.get_contained(begin, end):
+                results.append(item)
+        if end >= self._center and self.right:
+            for item in self.right.get_contained(begin, end):
+                results.append(item)
+
+        return results
+
+    def get_enclosing(self, begin: numbers.Number, end: numbers.Number) -> typing.List[Interval]:
+        """
+        Return intervals that enclose given `begin` and `end` coordinates.
+        :param begin: 0-based (excluded) begin coordinate
+        :param end: 0-based (included) end coordinate
+        :return: list of enclosing intervals
+        """
+        results = []
+
+        if self._center is None:
+            # empty tree
+            return results
+
+        # intervals of the node begin before the center and end at or after the center
+        if end < self._center:
+            # all intervals end after the query, walk the intervals that begin before the query
+            for entry in self._keys:
+                if entry.begin > begin:
+                    break
+                for item in self.intervals[entry]:
+                    results.append(item)
+        elif begin >= self._center:
+            # all intervals begin before the query, walk the intervals that end after the query
+            for entry in self._by_end:
+                if entry.end < end:
+                    break
+                for item in self.intervals[entry]:
+                    results.append(item)
+        else:
+            for entry in self._keys:
+                if entry.begin > begin:
+                    break
+                if entry.end >= end:
+                    for item in self.intervals[entry]:
+                        results.append(item)
+
+        # intervals of the left subtree end before the center, intervals of the right subtree begin after the center
+        if end < self._center and self.left:
+            for item in self.left.get_enclosing(begin, end):
+                results.append(item)
+        elif begin >= self._center and self.right:
+            for item in self.right.get_enclosing(begin, end):
+                results.append(item)
+
+        return results
+
     def min_value(self):
         return next(iter(self.intervals))
 
@@ -131,6 +287,10 @@ class IntervalNode:
     def __len__(self):
         return len(self.intervals) if self.intervals else 0
 
+    def __bool__(self):
+        # a node with no intervals of its own may still have children
+        return self._center is not None
+
     def __repr__(self):
         intstr = ','.join([str(key) for key in self.intervals.keys()])
         return "ITNode(intervals=[{}])".format(intstr)
@@ -0,0 +1,141 @@
+import bisect
+import numbers
+import typing
+from collections import namedtuple
+
+from ddalg.model import Interval
+from ._node import IntervalNode
+
+
+class Summary(namedtuple('Summary', ['count', 'total', 'minimum', 'maximum'])):
+    """Summary of numeric payloads that can be combined with other summaries."""
+
+    __slots__ = ()
+
+    @classmethod
+    def empty(cls):
+        return cls(0, 0, None, None)
+
+    @classmethod
+    def of(cls, values: typing.Iterable[float]):
+        summary = cls.empty()
+        for value in values:
+            summary = summary.combine(cls(1, value, value, value))
+        return summary
+
+    def combine(self, other):
+        if not self.count:
+            return other
+        if not other.count:
+            return self
+        return Summary(self.count + other.count, self.total + other.total,
+                       min(self.minimum, other.minimum), max(self.maximum, other.maximum))
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+
+# functions for getting the aggregated value out of a summary
+REDUCERS = {
+    'count': lambda summary: summary.count,
+    'sum': lambda summary: summary.total,
+    'min': lambda summary: summary.minimum,
+    'max': lambda summary: summary.maximum,
+    'mean': lambda summary: summary.mean,
+}
+
+
+class AggregationIndex:
+    """
+    Payload summaries of the nodes of a centered interval tree.
+
+    The coordinate bounds of the node intervals and of the whole subtree of each node are computed when the index
+    is created. The node summaries of a payload are computed upon the first query with the payload. Both are stored
+    in tables keyed by the node, hence the nodes do not hold any aggregation state. A subtree or a node whose
+    intervals all overlap with the query contributes its summary without visiting the intervals.
+    """
+
+    def __init__(self, root: IntervalNode):
+        self._root = root
+        # node id -> (min begin, max begin, min end, max end) of the node intervals and of the subtree intervals
+        self._bounds = {}
+        # payload name -> {node id -> (summary of the node intervals, summary of the subtree intervals)}
+        self._summaries = {}
+        if root:
+            self._compute_bounds(root)
+
+    def aggregate(self, begin: numbers.Number, end: numbers.Number, name: str,
+                  payload: typing.Callable[[Interval], float]) -> Summary:
+        """
+        Summarize payloads of intervals that overlap with given `begin` and `end` coordinates.
+        :param begin: 0-based (excluded) begin coordinate
+        :param end: 0-based (included) end coordinate
+        :param name: name of the payload
+        :param payload: function for getting numeric payload of an interval
+        :return: summary of the payloads
+        """
+        if not self._root:
+            return Summary.empty()
+        if name not in self._summaries:
+            self._summaries[name] = {}
+            self._summarize(self._root, payload, self._summaries[name])
+        return self._aggregate(self._root, begin, end, payload, self._summaries[name])
+
+    def discard(self, name: str):
+        """
+        Drop the summaries of the payload.
+        :param name: name of the payload
+        :return: None
+        """
+        self._summaries.pop(name, None)
+
+    def _compute_bounds(self, node: IntervalNode) -> typing.Tuple:
+        ends = [entry.end for entry in node._keys]
+        node_bounds = (node._begins[0], node._begins[-1], min(ends), max(ends)) if ends \
+            else (float('inf'), float('-inf'), float('inf'), float('-inf'))
+        tree_bounds = node_bounds
+        for child in (node.left, node.right):
+            if child:
+                child_bounds = self._compute_bounds(child)
+                tree_bounds = (min(tree_bounds[0], child_bounds[0]), max(tree_bounds[1], child_bounds[1]),
+                               min(tree_bounds[2], child_bounds[2]), max(tree_bounds[3], child_bounds[3]))
+        self._bounds[id(node)] = node_bounds, tree_bounds
+        return tree_bounds
+
+    def _summarize(self, node: IntervalNode, payload, summaries: typing.Dict) -> Summary:
+        node_summary = Summary.of(payload(item) for items in node.intervals.values() for item in items)
+        tree_summary = node_summary
+        for child in (node.left, node.right):
+            if child:
+                tree_summary = tree_summary.combine(self._summarize(child, payload, summaries))
+        summaries[id(node)] = node_summary, tree_summary
+        return tree_summary
+
+    def _aggregate(self, node: IntervalNode, begin, end, payload, summaries: typing.Dict) -> Summary:
+        node_bounds, tree_bounds = self._bounds[id(node)]
+        min_begin, max_begin, min_end, max_end = tree_bounds
+        if min_begin >= end or max_end <= begin:
+            # no overlapping interval in the subtree
+            return Summary.empty()
+
+        node_summary, tree_summary = summaries[id(node)]
+        if min_end > begin and max_begin < end:
+            # all intervals of the subtree overlap with the query
+            return tree_summary
+
+        min_begin, max_begin, min_end, max_end = node_bounds
+        if min_end > begin and max_begin < end:
+            result = node_summary
+        else:
+            result = Summary.of(payload(item)
+                                for entry in node._keys[:bisect.bisect_left(node._begins, end)]
+                                if entry.end > begin
+                                for item in node.intervals[entry])
+
+        if begin <= node._center and node.left:
+            result = result.combine(self._aggregate(node.left, begin, end, payload, summaries))
+        if end > node._center and node.right:
+            result = result.combine(self._aggregate(node.right, begin, end, payload, summaries))
+
+        return result
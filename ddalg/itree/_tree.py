@@ -1,31 +1,156 @@
+import bisect
+import heapq
 import logging
 import numbers
+import timeit
 import typing
 from collections import deque
 
+import numpy as np
 from deprecation import deprecated
 
 from ddalg import __version__
-from ddalg.metrics.interval import get_boundary_margin, jaccard_coefficient
+from ddalg.metrics.interval import get_boundary_margin, jaccard_coefficient, reciprocal_overlap
 from ddalg.model import Interval
+from ._bin_index import BinIndexEngine
+from ._binned import get_binned_counts, get_binned_coverage
+from ._depth import DepthIndex
+from ._engine import ENGINES, select_engine
 from ._node import IntervalNode
+from ._summary import REDUCERS, AggregationIndex, Summary
+
+# similarity metrics supported by `IntervalTree.get_best_matches`
+_METRICS = {'jaccard': jaccard_coefficient, 'reciprocal': reciprocal_overlap}
 
 
 class IntervalTree:
 
-    def __init__(self, intervals: typing.List[Interval]):
-        self._head = IntervalNode(intervals)
+    def __init__(self, intervals: typing.List[Interval], engine='tree'):
+        """
+        Create the tree from given intervals.
+        :param intervals: list with intervals
+        :param engine: name of the engine answering the queries, one of `tree` (centered interval tree),
+        `sorted` (sorted array), `linear` (linear scan), `binning` (hierarchical bin index), or `auto` to select
+        the engine based on the intervals. A `BinIndexEngine` created from the same `intervals` in the same order,
+        e.g. loaded by `BinIndexEngine.load`, is used as is and the tree is rebuilt by the `binning` engine
+        """
+        self._loaded = None
+        if isinstance(engine, BinIndexEngine):
+            if len(engine._intervals) != len(intervals) \
+                    or any(indexed is not interval for indexed, interval in zip(engine._intervals, intervals)):
+                raise ValueError("engine must be created from the same intervals in the same order")
+            self._loaded, engine = engine, 'binning'
+        if engine != 'auto' and engine not in ENGINES:
+            raise ValueError("engine must be `auto` or one of {} but was `{}`".format(sorted(ENGINES), engine))
+        self._engine = engine
         self._intervals = intervals
-        self._in_sync = True
-        self._size = len(intervals)
+        self._sorted = None
+        self._in_sync = False
+        self._payloads = {}
         self._logger = logging.getLogger(__name__)
+        self.build()
 
     def build(self):
         if not self._in_sync:
-            self._head = IntervalNode(self._intervals)
+            if self._loaded is not None:
+                self._engine_name, self._engine_rationale = self._engine, 'created by user'
+            elif self._engine == 'auto':
+                self._engine_name, self._engine_rationale = select_engine(self._intervals)
+            else:
+                self._engine_name, self._engine_rationale = self._engine, 'selected by user'
+            self._logger.debug("Using `{}` engine: {}".format(self._engine_name, self._engine_rationale))
+            if self._loaded is not None:
+                self._head, self._loaded = self._loaded, None
+            elif self._engine_name == 'tree' and self._sorted is not None:
+                # the position sorted intervals are at hand, e.g. in a merged tree
+                self._head = IntervalNode.from_sorted(self._sorted)
+            else:
+                self._head = ENGINES[self._engine_name](self._intervals)
+            self._max_ends = None
+            self._arrays = None
+            self._depth_index = None
+            self._aggregation_index = None
             self._in_sync = True
             self._size = len(self._intervals)
 
+    @classmethod
+    def merge(cls, trees: typing.Iterable['IntervalTree'], engine='tree') -> 'IntervalTree':
+        """
+        Create a new tree with intervals of given trees.
+
+        The position sorted intervals of the trees are combined by a k-way merge. The `tree` engine of the new tree
+        is then built directly from the merged order by `IntervalNode.from_sorted`, which takes the node centers from
+        sorted coordinate arrays and partitions the intervals with NumPy. The centers are still recomputed at each
+        level, hence the merge is not linear, but it avoids the sort and the Python-level partitioning of a rebuild.
+        The `sorted` engine just sorts the merged intervals again, which is linear for sorted input. The new tree
+        is equal to the tree built from the concatenated intervals of the trees.
+        :param trees: trees to be merged
+        :param engine: name of the engine of the new tree
+        :return: the new tree
+        """
+        sorted_intervals = []
+        for tree in trees:
+            sorted_intervals.append(tree._get_sorted())
+        merged = list(heapq.merge(*sorted_intervals))
+
+        tree = cls([], engine=engine)
+        tree._intervals, tree._sorted = list(merged), merged
+        tree._in_sync = False
+        tree.build()
+        return tree
+
+    @property
+    def engine(self) -> str:
+        """
+        :return: name of the engine answering the queries
+        """
+        self.build()  # make sure the tree is up-to-date
+        return self._engine_name
+
+    @property
+    def engine_rationale(self) -> str:
+        """
+        :return: reason why the current engine has been selected
+        """
+        self.build()  # make sure the tree is up-to-date
+        return self._engine_rationale
+
+    def tune(self, queries: typing.Sequence, repeat=3) -> str:
+        """
+        Select the engine that answers given queries in the shortest time. The selected engine is used until
+        the next call to `tune`.
+        :param queries: sequence of observed queries, either 1-based positions or (begin, end) tuples
+        :param repeat: number of timing repetitions for each engine
+        :return: name of the selected engine
+        """
+        self.build()  # make sure the tree is up-to-date
+
+        def run(engine):
+            for query in queries:
+                if isinstance(query, tuple):
+                    engine.get_overlaps(*query)
+                else:
+                    engine.search(query)
+
+        timings = {}
+        for name, engine_cls in ENGINES.items():
+            try:
+                engine = engine_cls(self._intervals)
+            except ValueError as e:
+                # the engine does not support the intervals
+                self._logger.debug("Skipping `{}` engine: {}".format(name, e))
+                continue
+            timings[name] = min(timeit.repeat(lambda: run(engine), number=1, repeat=repeat))
+
+        best = min(timings, key=timings.get)
+        self._engine = self._engine_name = best
+        self._engine_rationale = 'fastest on {} observed queries ({})'.format(
+            len(queries), ', '.join('{}={:.2e}s'.format(name, timings[name]) for name in sorted(timings)))
+        self._logger.debug("Using `{}` engine: {}".format(self._engine_name, self._engine_rationale))
+        self._head = ENGINES[best](self._intervals)
+        self._aggregation_index = None
+        return best
+
     def insert(self, interval: Interval):
         """
         Insert interval into the tree. The insert results in invalidation of the tree leading to lazy rebuild of
@@ -34,6 +159,7 @@ class IntervalTree:
         :return: None
         """
         self._intervals.append(interval)
+        self._sorted = None
         self._in_sync = False
 
     def search(self, position: numbers.Number) -> typing.List[Interval]:
@@ -45,6 +171,94 @@ class IntervalTree:
         self.build()  # make sure the tree is up-to-date
         return self._head.search(position)
 
+    def search_sorted(self, positions: typing.Iterable[numbers.Number]) -> typing.List[typing.List[Interval]]:
+        """
+        Return intervals that overlap with each of the given sorted `positions`.
+
+        The positions are processed in a single forward walk over the position sorted intervals, while keeping
+        the set of intervals that are active at the current position. This is faster than calling `search`
+        for each position.
+        :param positions: iterable with 1-based numeric positions sorted in non-decreasing order
+        :return: list with a list (not necessarily sorted) of overlapping intervals for each position
+        """
+        sorted_intervals = self._get_sorted()
+        results = []
+        active = []  # heap of (end, idx, interval) tuples
+        idx, size = 0, len(sorted_intervals)
+        previous = None
+
+        for position in positions:
+            if previous is not None and position < previous:
+                raise ValueError("Positions must be sorted but `{}` follows `{}`".format(position, previous))
+            previous = position
+
+            # activate intervals that begin before the position
+            while idx < size and sorted_intervals[idx].begin < position:
+                interval = sorted_intervals[idx]
+                heapq.heappush(active, (interval.end, idx, interval))
+                idx += 1
+
+            # retire intervals that end before the position
+            while active and active[0][0] < position:
+                heapq.heappop(active)
+
+            results.append([entry[2] for entry in active])
+
+        return results
+
+    def get_overlaps_sorted(self, queries: typing.Iterable[typing.Tuple[numbers.Number, numbers.Number]]) \
+            -> typing.List[typing.List[Interval]]:
+        """
+        Get intervals that overlap with each of the given query coordinates sorted by begin position.
+
+        The queries are processed in a single forward walk over the position sorted intervals, in the same way as
+        in `search_sorted`. The intervals that begin before the end of any query seen so far are kept active until
+        they end before the begin of the current query.
+        :param queries: iterable with (begin, end) tuples sorted by begin in non-decreasing order
+        :return: list with a list (not necessarily sorted) of overlapping intervals for each query
+        """
+        sorted_intervals = self._get_sorted()
+        results = []
+        active = []  # heap of (end, idx, interval) tuples
+        idx, size = 0, len(sorted_intervals)
+        previous = None
+
+        for begin, end in queries:
+            if previous is not None and begin < previous:
+                raise ValueError("Queries must be sorted but `{}` follows `{}`".format(begin, previous))
+            previous = begin
+
+            # activate intervals that begin before the query end
+            while idx < size and sorted_intervals[idx].begin < end:
+                interval = sorted_intervals[idx]
+                heapq.heappush(active, (interval.end, idx, interval))
+                idx += 1
+
+            # retire intervals that end before the query begin
+            while active and active[0][0] <= begin:
+                heapq.heappop(active)
+
+            # a preceding longer query may have activated intervals beyond the query end
+            results.append([entry[2] for entry in active if entry[2].begin < end])
+
+        return results
+
+    def _get_sorted(self) -> typing.List[Interval]:
+        # intervals sorted by position are needed only by some queries, hence they are sorted upon the first use
+        self.build()  # make sure the tree is up-to-date
+        if self._sorted is None:
+            self._sorted = sorted(self._intervals)
+        return self._sorted
+
+    def _get_max_ends(self) -> typing.List[numbers.Number]:
+        # running maximum of the end coordinates of the position sorted intervals
+        sorted_intervals = self._get_sorted()
+        if self._max_ends is None:
+            self._max_ends = []
+            for interval in sorted_intervals:
+                self._max_ends.append(max(self._max_ends[-1], interval.end) if self._max_ends else interval.end)
+        return self._max_ends
+
     def get_overlaps(self, begin, end) -> typing.List[Interval]:
         """
         Get intervals that overlap with given query coordinates.
@@ -55,6 +269,198 @@ class IntervalTree:
         self.build()  # make sure the tree is up-to-date
         return self._head.get_overlaps(begin, end)
 
+    def get_contained(self, begin, end) -> typing.List[Interval]:
+        """
+        Get intervals that are fully contained within given query coordinates.
+        :param begin: 0-based (excluded) begin position of query
+        :param end: 0-based (included) end position of query
+        :return: list (not necessarily sorted) with intervals contained within query coordinates
+        """
+        self.build()  # make sure the tree is up-to-date
+        return self._head.get_contained(begin, end)
+
+    def get_enclosing(self, begin, end) -> typing.List[Interval]:
+        """
+        Get intervals that fully enclose given query coordinates.
+        :param begin: 0-based (excluded) begin position of query
+        :param end: 0-based (included) end position of query
+        :return: list (not necessarily sorted) with intervals enclosing query coordinates
+        """
+        self.build()  # make sure the tree is up-to-date
+        return self._head.get_enclosing(begin, end)
+
+    def add_payload(self, name: str, payload: typing.Callable[[Interval], float]):
+        """
+        Register numeric payload of the intervals to be aggregated by `aggregate`. The payload registered under
+        an existing name replaces the previous payload.
+        :param name: name of the payload
+        :param payload: function for getting numeric payload of an interval
+        :return: None
+        """
+        if not callable(payload):
+            raise ValueError("payload must be callable but was `{}`".format(payload))
+        self._payloads[name] = payload
+        if self._aggregation_index is not None:
+            self._aggregation_index.discard(name)
+
+    def aggregate(self, begin, end, payload: str, reducer='sum'):
+        """
+        Aggregate numeric payloads of intervals that overlap with given query coordinates.
+
+        The `tree` engine computes the payload summaries of the tree nodes upon the first query with given `payload`
+        and combines the summaries of the subtrees that overlap with the query completely. The summaries are kept until
+        the tree is rebuilt.
+        :param begin: 0-based (excluded) begin position of query
+        :param end: 0-based (included) end position of query
+        :param payload: name of the payload registered by `add_payload`
+        :param reducer: one of `count`, `sum`, `min`, `max`, `mean`
+        :return: aggregated value, `None` for `min`, `max`, and `mean` if no interval overlaps with the query
+        """
+        if payload not in self._payloads:
+            raise ValueError("payload must be one of {} but was `{}`".format(sorted(self._payloads), payload))
+        if reducer not in REDUCERS:
+            raise ValueError("reducer must be one of {} but was `{}`".format(sorted(REDUCERS), reducer))
+
+        self.build()  # make sure the tree is up-to-date
+        if isinstance(self._head, IntervalNode):
+            if self._aggregation_index is None:
+                self._aggregation_index = AggregationIndex(self._head)
+            summary = self._aggregation_index.aggregate(begin, end, payload, self._payloads[payload])
+        else:
+            summary = Summary.of(self._payloads[payload](interval)
+                                 for interval in self._head.get_overlaps(begin, end))
+        return REDUCERS[reducer](summary)
+
+    def max_depth(self, begin, end) -> int:
+        """
+        Get the maximum number of simultaneously overlapping intervals within given query coordinates.
+        The index for answering the query is built upon the first call.
+        :param begin: 0-based (excluded) begin position of query
+        :param end: 0-based (included) end position of query
+        :return: the maximum depth
+        """
+        return self._get_depth_index().max_depth(begin, end)
+
+    def max_depth_batch(self, begins, ends):
+        """
+        Get the maximum number of simultaneously overlapping intervals within each of given query coordinates.
+        :param begins: array-like with 0-based (excluded) begin positions of queries
+        :param ends: array-like with 0-based (included) end positions of queries
+        :return: array with the maximum depth for each query
+        """
+        return self._get_depth_index().max_depth_batch(begins, ends)
+
+    def _get_depth_index(self) -> DepthIndex:
+        self.build()  # make sure the tree is up-to-date
+        if self._depth_index is None:
+            self._depth_index = DepthIndex(*self._get_arrays())
+        return self._depth_index
+
+    def get_best_matches(self, begin, end, k=1, metric='jaccard') -> typing.List[typing.Tuple[Interval, float]]:
+        """
+        Get `k` intervals that are the most similar to given query coordinates.
+
+        The intervals are visited in order of decreasing upper bound of the similarity that an interval with given
+        begin coordinate may achieve. The traversal stops as soon as the bound drops below the score of the `k`-th
+        best match, or when no remaining interval overlaps with the query. The intervals that begin before the query
+        are visited only while the running maximum of their end coordinates reaches into the query. Ties are broken
+        by the interval order.
+        :param begin: 0-based (excluded) begin position of query
+        :param end: 0-based (included) end position of query
+        :param k: maximum number of matches to return
+        :param metric: similarity metric, either `jaccard` (`jaccard_coefficient`) or `reciprocal`
+        (`reciprocal_overlap`)
+        :return: list with at most `k` (interval, score) tuples of overlapping intervals sorted by decreasing score
+        """
+        if metric not in _METRICS:
+            raise ValueError("metric must be one of {} but was `{}`".format(sorted(_METRICS), metric))
+        if k < 1:
+            raise ValueError("k must be positive but was `{}`".format(k))
+        if end <= begin:
+            raise ValueError("end `{}` must be greater than begin `{}`".format(end, begin))
+
+        sorted_intervals = self._get_sorted()
+        max_ends = self._get_max_ends()
+        score_fn = _METRICS[metric]
+        query = SimpleInterval.of(begin, end)
+        best = []  # min heap of (score, -idx, interval) tuples, the worst match is on top
+
+        def upper_bound(idx):
+            if not 0 <= idx < len(sorted_intervals):
+                return -1.
+            # the best score is achieved by an interval that ends at query end,
+            # the bound is the same for both supported metrics
+            interval_begin = sorted_intervals[idx].begin
+            if interval_begin >= end:
+                return 0.
+            return (end - max(interval_begin, begin)) / (end - min(interval_begin, begin))
+
+        # walk away from the query begin in both directions, always taking the interval with the higher bound
+        right = bisect.bisect_left(sorted_intervals, query)
+        left = right - 1
+        while True:
+            if left >= 0 and max_ends[left] <= begin:
+                # no interval on the left reaches the query
+                left = -1
+            left_bound, right_bound = upper_bound(left), upper_bound(right)
+            bound = max(left_bound, right_bound)
+            if bound <= 0 or (len(best) == k and bound < best[0][0]):
+                # no remaining interval can beat the current matches
+                break
+            if left_bound >= right_bound:
+                idx, left = left, left - 1
+            else:
+                idx, right = right, right + 1
+
+            interval = sorted_intervals[idx]
+            score = score_fn(interval, query)
+            if score > 0:
+                entry = (score, -idx, interval)
+                if len(best) < k:
+                    heapq.heappush(best, entry)
+                elif entry[:2] > best[0][:2]:
+                    heapq.heapreplace(best, entry)
+
+        return [(entry[2], entry[0]) for entry in sorted(best, key=lambda e: e[:2], reverse=True)]
+
+    def get_binned_counts(self, begin, end, bin_size, weight: typing.Callable[[Interval], float] = None):
+        """
+        Count intervals that overlap with fixed-size bins spanning given region.
+        :param begin: 0-based (excluded) begin coordinate of the region
+        :param end: 0-based (included) end coordinate of the region
+        :param bin_size: positive bin size
+        :param weight: optional function for getting interval weight to be summed instead of counting the intervals
+        :return: a tuple with array of `n` counts and array with `n+1` bin edges
+        """
+        begins, ends = self._get_arrays()
+        return get_binned_counts(begins, ends, begin, end, bin_size, weights=self._get_weights(weight))
+
+    def get_binned_coverage(self, begin, end, bin_size, weight: typing.Callable[[Interval], float] = None):
+        """
+        Sum bases of the intervals that overlap with fixed-size bins spanning given region.
+        :param begin: 0-based (excluded) begin coordinate of the region
+        :param end: 0-based (included) end coordinate of the region
+        :param bin_size: positive bin size
+        :param weight: optional function for getting interval weight to multiply the overlapping bases with
+        :return: a tuple with array of `n` sums of overlapping bases and array with `n+1` bin edges
+        """
+        begins, ends = self._get_arrays()
+        return get_binned_coverage(begins, ends, begin, end, bin_size, weights=self._get_weights(weight))
+
+    def _get_arrays(self) -> typing.Tuple[np.ndarray, np.ndarray]:
+        # arrays with begin and end coordinates of the intervals are created upon the first use
+        self.build()  # make sure the tree is up-to-date
+        if self._arrays is None:
+            self._arrays = (np.array([interval.begin for interval in self._intervals]),
+                            np.array([interval.end for interval in self._intervals]))
+        return self._arrays
+
+    def _get_weights(self, weight) -> typing.Optional[np.ndarray]:
+        # weights are in the same order as the coordinate arrays
+        if weight is None:
+            return None
+        return np.array([weight(interval) for interval in self._intervals], dtype=float)
+
     @deprecated(deprecated_in='0.0.3', removed_in='0.0.5', current_version=__version__,
                 details='Get all overlapping intervals using `get_overlaps` and then remove using methods from '
                         '`ddalg.metrics.interval` module.')
@@ -115,7 +521,9 @@ class IntervalTree:
 
     def __iter__(self):
         self.build()  # make sure the tree is up-to-date
-        return IntervalTreeIterator(self._head)
+        if isinstance(self._head, IntervalNode):
+            return IntervalTreeIterator(self._head)
+        return iter(self._get_sorted())
 
     def __bool__(self):
         return len(self) != 0
@@ -140,9 +548,7 @@ class IntervalTreeIterator:
                 # the tree is empty, no node
                 return False
 
-        if self.queue:
-            return True
-        else:
+        while not self.queue and self.node:
             # done iterating elements from the current node, try the next node
             self.node = self.successor(self.node)
             self.queue = self.node_to_queue(self.node)
@@ -169,7 +575,7 @@ class IntervalTreeIterator:
         if node.right:
             return node.right.minimum()
         y = node.parent
-        while y and node == y.right:
+        while y and node is y.right:
             node = y
             y = y.parent
         return y
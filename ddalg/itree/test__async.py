@@ -0,0 +1,103 @@
+import asyncio
+import unittest
+
+from ddalg.model.test__interval import make_intervals
+from ._async import AsyncIntervalTree
+from ._tree import IntervalTree, SimpleInterval
+
+
+class FailingTree(IntervalTree):
+    """Tree failing to answer queries at position `0` and with begin coordinate `11`."""
+
+    def search(self, position):
+        if position == 0:
+            raise RuntimeError("Failed to search {}".format(position))
+        return super().search(position)
+
+    def search_sorted(self, positions):
+        if 0 in positions:
+            raise RuntimeError("Failed to search {}".format(positions))
+        return super().search_sorted(positions)
+
+    def get_overlaps_sorted(self, queries):
+        if any(begin == 11 for begin, _ in queries):
+            raise RuntimeError("Failed to get overlaps of {}".format(queries))
+        return super().get_overlaps_sorted(queries)
+
+    def get_overlaps(self, begin, end):
+        if begin == 11:
+            raise RuntimeError("Failed to get overlaps of {}-{}".format(begin, end))
+        return super().get_overlaps(begin, end)
+
+
+class TestAsyncIntervalTree(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tree = IntervalTree(make_intervals(0, 3, 9))
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self) -> None:
+        self.loop.close()
+
+    def run_all(self, coros):
+        async def gather():
+            return await asyncio.gather(*coros)
+
+        return self.loop.run_until_complete(gather())
+
+    def test_search(self):
+        atree = AsyncIntervalTree(self.tree)
+        positions = [6, 1, 12, 6, 0]
+        results = self.run_all([atree.search(p) for p in positions])
+
+        for position, result in zip(positions, results):
+            self.assertListEqual(sorted(self.tree.search(position)), sorted(result))
+        self.assertEqual(5, atree.stats.queries)
+        self.assertEqual(1, atree.stats.batches)
+
+        # test error input
+        self.assertRaises(ValueError, self.loop.run_until_complete, atree.search('BlaBla'))
+
+    def test_get_overlaps(self):
+        atree = AsyncIntervalTree(self.tree)
+        queries = [(4, 6), (0, 1), (11, 12)]
+        coros = [atree.get_overlaps(*query) for query in queries] + [atree.search(6)]
+        results = self.run_all(coros)
+
+        for query, result in zip(queries, results):
+            self.assertListEqual(sorted(self.tree.get_overlaps(*query)), sorted(result))
+        self.assertListEqual([SimpleInterval(3, 6), SimpleInterval(4, 7), SimpleInterval(5, 8)], sorted(results[-1]))
+
+        # test error input
+        self.assertRaises(ValueError, self.loop.run_until_complete, atree.get_overlaps('BlaBla', 6))
+        self.assertRaises(ValueError, self.loop.run_until_complete, atree.get_overlaps(4, None))
+
+    def test_failing_query(self):
+        # the failing query does not fail the other queries of the batch
+        atree = AsyncIntervalTree(FailingTree(make_intervals(0, 3, 9)))
+
+        async def gather():
+            return await asyncio.gather(atree.search(1), atree.search(0), atree.search(6), atree.get_overlaps(4, 6),
+                                        atree.get_overlaps(11, 12), return_exceptions=True)
+
+        results = self.loop.run_until_complete(gather())
+        self.assertEqual(1, atree.stats.batches)
+        self.assertListEqual([SimpleInterval(0, 3)], results[0])
+        self.assertIsInstance(results[1], RuntimeError)
+        self.assertListEqual([SimpleInterval(3, 6), SimpleInterval(4, 7), SimpleInterval(5, 8)], sorted(results[2]))
+        self.assertListEqual(sorted(self.tree.get_overlaps(4, 6)), sorted(results[3]))
+        self.assertIsInstance(results[4], RuntimeError)
+
+    def test_max_batch_size(self):
+        atree = AsyncIntervalTree(self.tree, max_batch_size=2, max_latency=10.)
+        results = self.run_all([atree.search(p) for p in range(1, 5)])
+
+        self.assertListEqual([[SimpleInterval(0, 3)]], results[:1])
+        self.assertEqual(4, atree.stats.queries)
+        self.assertEqual(2, atree.stats.batches)
+        self.assertEqual(2, atree.stats.largest_batch)
+        self.assertAlmostEqual(2., atree.stats.mean_batch_size, delta=1e-5)
+
+    def test_invalid_parameters(self):
+        self.assertRaises(ValueError, AsyncIntervalTree, self.tree, 0)
+        self.assertRaises(ValueError, AsyncIntervalTree, self.tree, 1, -1.)
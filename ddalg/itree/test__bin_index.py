@@ -0,0 +1,105 @@
+import io
+import unittest
+
+import numpy as np
+
+from ddalg.model.test__interval import make_intervals
+from ._bin_index import BinIndexEngine, _region_to_bin, _region_to_bins
+from ._engine import LinearScanEngine
+from ._tree import IntervalTree, SimpleInterval
+
+
+class TestBinIndexEngine(unittest.TestCase):
+
+    def setUp(self) -> None:
+        # short intervals in the smallest bins along with intervals spanning bin boundaries
+        self.intervals = make_intervals(0, 3, 9) + make_intervals(16380, 16390, 3, step=5) + \
+                         [SimpleInterval(100, 200000), SimpleInterval(5, 5)]
+        self.engine = BinIndexEngine(self.intervals)
+        self.linear = LinearScanEngine(self.intervals)
+
+    def test_region_to_bin(self):
+        np.testing.assert_array_equal([4681, 4681, 4682, 585, 0],
+                                      _region_to_bin(np.array([0, 16383, 16384, 16383, 0]),
+                                                     np.array([1, 16384, 16385, 16385, 1 << 27])))
+
+    def test_region_to_bins(self):
+        np.testing.assert_array_equal([0, 1, 9, 73, 585, 4681, 4682], _region_to_bins(16383, 16385))
+
+    def test_search(self):
+        for position in (0, 1, 6, 11, 100, 101, 16385, 16390, 200000, 200001):
+            self.assertListEqual(self.linear.search(position), self.engine.search(position))
+
+        # test error input
+        self.assertRaises(ValueError, self.engine.search, 'BlaBla')
+
+    def test_get_overlaps(self):
+        for begin, end in ((0, 1), (4, 6), (5, 5), (16384, 16385), (150000, 300000), (-10, 0)):
+            self.assertListEqual(self.linear.get_overlaps(begin, end), self.engine.get_overlaps(begin, end))
+
+    def test_get_contained_and_enclosing(self):
+        for begin, end in ((0, 5), (4, 6), (5, 5), (16380, 16400), (0, 300000), (200, 300)):
+            self.assertListEqual(self.linear.get_contained(begin, end), self.engine.get_contained(begin, end))
+            self.assertListEqual(self.linear.get_enclosing(begin, end), self.engine.get_enclosing(begin, end))
+
+    def test_save_and_load(self):
+        buffer = io.BytesIO()
+        self.engine.save(buffer)
+        buffer.seek(0)
+        engine = BinIndexEngine.load(buffer, self.intervals)
+
+        self.assertListEqual(self.engine.get_overlaps(4, 6), engine.get_overlaps(4, 6))
+        self.assertListEqual(self.engine.search(16385), engine.search(16385))
+
+        # the tree adopts the loaded engine
+        buffer.seek(0)
+        tree = IntervalTree(self.intervals, engine=BinIndexEngine.load(buffer, self.intervals))
+        self.assertEqual('binning', tree.engine)
+        self.assertListEqual(self.engine.get_overlaps(4, 6), tree.get_overlaps(4, 6))
+        tree.insert(SimpleInterval(5, 7))
+        self.assertEqual('binning', tree.engine)
+        self.assertIn(SimpleInterval(5, 7), tree.get_overlaps(4, 6))
+
+        # test error input
+        buffer.seek(0)
+        self.assertRaises(ValueError, BinIndexEngine.load, buffer, self.intervals[1:])
+        # the tree does not adopt an engine of other intervals
+        self.assertRaises(ValueError, IntervalTree, self.intervals[1:], self.engine)
+        self.assertRaises(ValueError, IntervalTree, self.intervals[1:] + self.intervals[:1], self.engine)
+        self.assertRaises(ValueError, IntervalTree, [SimpleInterval(interval.begin, interval.end)
+                                                     for interval in self.intervals], self.engine)
+        buffer.seek(0)
+        self.assertRaises(ValueError, BinIndexEngine.load, buffer, self.intervals[1:] + self.intervals[:1])
+        buffer.seek(0)
+        self.assertRaises(ValueError, BinIndexEngine.load, buffer, self.intervals[:-1] + [SimpleInterval(5, 6)])
+
+    def test_order(self):
+        # the results are position sorted, the intervals with equal coordinates keep their order
+        first, second = SimpleInterval(4, 8), SimpleInterval(4, 8)
+        engine = BinIndexEngine([SimpleInterval(6, 7), second, SimpleInterval(2, 5), first, SimpleInterval(4, 6)])
+        results = engine.get_overlaps(5, 6)
+        self.assertListEqual([SimpleInterval(4, 6), SimpleInterval(4, 8), SimpleInterval(4, 8)], results)
+        self.assertIs(second, results[1])
+        self.assertIs(first, results[2])
+
+    def test_empty(self):
+        engine = BinIndexEngine([])
+        self.assertListEqual([], engine.search(1))
+        self.assertListEqual([], engine.get_overlaps(0, 1))
+
+    def test_invalid_coordinates(self):
+        self.assertRaises(ValueError, BinIndexEngine, [SimpleInterval(-1, 3)])
+        self.assertRaises(ValueError, BinIndexEngine, [SimpleInterval(0, (1 << 29) + 1)])
+        self.assertRaises(ValueError, BinIndexEngine, [SimpleInterval(1 << 29, 1 << 29)])
+
+    def test_max_coordinate(self):
+        top = 1 << 29
+        intervals = [SimpleInterval(top - 1, top), SimpleInterval(top - 1, top - 1), SimpleInterval(top - 5, top),
+                     SimpleInterval(0, top)]
+        engine, linear = BinIndexEngine(intervals), LinearScanEngine(intervals)
+        for begin, end in ((top - 5, top), (top - 1, top), (top - 1, top + 10), (top, top), (top - 2, top - 1)):
+            self.assertListEqual(linear.get_overlaps(begin, end), engine.get_overlaps(begin, end))
+            self.assertListEqual(linear.get_contained(begin, end), engine.get_contained(begin, end))
+            self.assertListEqual(linear.get_enclosing(begin, end), engine.get_enclosing(begin, end))
+        self.assertListEqual(linear.search(top), engine.search(top))
+        self.assertRaises(ValueError, BinIndexEngine, [SimpleInterval(0, 1.5)])
@@ -0,0 +1,43 @@
+import unittest
+
+import numpy as np
+
+from ._binned import get_bin_edges, get_binned_counts, get_binned_coverage
+
+
+class TestBinned(unittest.TestCase):
+
+    def setUp(self) -> None:
+        # intervals=[(0,3), (2,12), (5,5), (18,25)]
+        self.begins = [0, 2, 5, 18]
+        self.ends = [3, 12, 5, 25]
+
+    def test_get_bin_edges(self):
+        np.testing.assert_array_equal([0, 5, 10, 15, 20], get_bin_edges(0, 20, 5))
+        np.testing.assert_array_equal([0, 5, 10, 12], get_bin_edges(0, 12, 5))
+
+        # test error input
+        self.assertRaises(ValueError, get_bin_edges, 0, 20, 0)
+        self.assertRaises(ValueError, get_bin_edges, 20, 0, 5)
+
+    def test_get_binned_counts(self):
+        counts, edges = get_binned_counts(self.begins, self.ends, 0, 20, 5)
+        np.testing.assert_array_equal([0, 5, 10, 15, 20], edges)
+        np.testing.assert_array_equal([2, 1, 1, 1], counts)
+
+        counts, _ = get_binned_counts(self.begins, self.ends, 0, 20, 5, weights=[1., 2., 4., 8.])
+        np.testing.assert_array_almost_equal([3., 2., 2., 8.], counts)
+
+        counts, _ = get_binned_counts([], [], 0, 20, 5)
+        np.testing.assert_array_equal([0, 0, 0, 0], counts)
+
+        # test error input
+        self.assertRaises(ValueError, get_binned_counts, [0, 1], [2], 0, 20, 5)
+        self.assertRaises(ValueError, get_binned_counts, [0], [2], 0, 20, 5, [1., 2.])
+
+    def test_get_binned_coverage(self):
+        bases, _ = get_binned_coverage(self.begins, self.ends, 0, 20, 5)
+        np.testing.assert_array_almost_equal([6., 5., 2., 2.], bases)
+
+        bases, _ = get_binned_coverage(self.begins, self.ends, 0, 20, 5, weights=[1., 2., 4., 8.])
+        np.testing.assert_array_almost_equal([9., 10., 4., 16.], bases)
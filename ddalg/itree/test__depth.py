@@ -0,0 +1,35 @@
+import unittest
+
+import numpy as np
+
+from ._depth import DepthIndex
+
+
+class TestDepthIndex(unittest.TestCase):
+
+    def setUp(self) -> None:
+        # intervals=[(0,10), (2,5), (3,8), (8,12), (20,30)]
+        self.index = DepthIndex([0, 2, 3, 8, 20], [10, 5, 8, 12, 30])
+
+    def test_max_depth(self):
+        self.assertEqual(3, self.index.max_depth(0, 30))
+        self.assertEqual(3, self.index.max_depth(4, 5))
+        self.assertEqual(2, self.index.max_depth(5, 10))
+        self.assertEqual(1, self.index.max_depth(10, 25))
+        self.assertEqual(0, self.index.max_depth(12, 20))
+        self.assertEqual(0, self.index.max_depth(-10, 0))
+        self.assertEqual(0, self.index.max_depth(30, 40))
+
+        # test error input
+        self.assertRaises(ValueError, self.index.max_depth, 5, 5)
+
+    def test_max_depth_batch(self):
+        np.testing.assert_array_equal([3, 2, 0], self.index.max_depth_batch([0, 5, 12], [30, 10, 20]))
+        np.testing.assert_array_equal([], self.index.max_depth_batch([], []))
+
+        # test error input
+        self.assertRaises(ValueError, self.index.max_depth_batch, [0, 1], [2])
+
+    def test_empty(self):
+        index = DepthIndex([], [])
+        self.assertEqual(0, index.max_depth(0, 10))
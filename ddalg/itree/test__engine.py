@@ -0,0 +1,71 @@
+import unittest
+
+from ddalg.model.test__interval import make_intervals
+from ._bin_index import BinIndexEngine
+from ._engine import BIN_INDEX_MIN_SIZE, LinearScanEngine, SortedArrayEngine, get_mean_scan_length, select_engine
+from ._node import IntervalNode
+from ._tree import SimpleInterval
+
+
+class TestEngines(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.intervals = make_intervals(0, 3, 9) + make_intervals(-10, 20, 3, step=10)
+        self.node = IntervalNode(self.intervals)
+        self.engines = [LinearScanEngine(self.intervals), SortedArrayEngine(self.intervals)]
+        # the bin index supports only non-negative coordinates
+        self.non_negative = [interval for interval in self.intervals if interval.begin >= 0]
+        self.engines_non_negative = [BinIndexEngine(self.non_negative)]
+
+    def test_search(self):
+        for engine in self.engines:
+            for position in range(-12, 25):
+                self.assertListEqual(sorted(self.node.search(position)), engine.search(position))
+
+            # test error input
+            self.assertRaises(ValueError, engine.search, 'BlaBla')
+
+    def test_get_overlaps(self):
+        for engine in self.engines:
+            for begin in range(-12, 25):
+                for end in range(begin, begin + 5):
+                    self.assertListEqual(sorted(self.node.get_overlaps(begin, end)), engine.get_overlaps(begin, end))
+
+    def test_get_contained_and_enclosing(self):
+        for engine in self.engines:
+            for begin in range(-12, 25):
+                for end in range(begin, begin + 5):
+                    self.assertListEqual(sorted(self.node.get_contained(begin, end)),
+                                         engine.get_contained(begin, end))
+                    self.assertListEqual(sorted(self.node.get_enclosing(begin, end)),
+                                         engine.get_enclosing(begin, end))
+
+    def test_bin_index_engine(self):
+        node = IntervalNode(self.non_negative)
+        for engine in self.engines_non_negative:
+            for begin in range(-12, 25):
+                self.assertListEqual(sorted(node.search(begin)), engine.search(begin))
+                for end in range(begin, begin + 5):
+                    self.assertListEqual(sorted(node.get_overlaps(begin, end)), engine.get_overlaps(begin, end))
+
+    def test_get_mean_scan_length(self):
+        # intervals=[(0,3), (1,4), (2,5)], scans from begins 0, 1, 2 visit 0, 1, 2 intervals
+        self.assertAlmostEqual(1., get_mean_scan_length(make_intervals(0, 3, 3)), delta=1e-5)
+        self.assertAlmostEqual(0., get_mean_scan_length(make_intervals(0, 3, 3, step=5)), delta=1e-5)
+        self.assertAlmostEqual(0., get_mean_scan_length([]), delta=1e-5)
+
+    def test_empty(self):
+        for engine in (LinearScanEngine([]), SortedArrayEngine([])):
+            self.assertListEqual([], engine.search(1))
+            self.assertListEqual([], engine.get_overlaps(0, 1))
+
+    def test_select_engine(self):
+        self.assertEqual('linear', select_engine(self.intervals)[0])
+        self.assertEqual('tree', select_engine(make_intervals(0, 3, 100, step=10))[0])
+        self.assertEqual('sorted', select_engine(make_intervals(0, 100, 100))[0])
+        # a single interval spanning all others makes the sorted array scan all intervals
+        name, rationale = select_engine(make_intervals(0, 20, 1000) + [SimpleInterval(-1, 1100)])
+        self.assertEqual('tree', name)
+        self.assertIn('long-tailed', rationale)
+        self.assertEqual('binning', select_engine(make_intervals(0, 3, BIN_INDEX_MIN_SIZE, step=10))[0])
+        self.assertEqual('tree', select_engine(make_intervals(-10, 3, BIN_INDEX_MIN_SIZE, step=10))[0])
@@ -42,6 +42,45 @@ class TestIntervalNode(unittest.TestCase):
     #     nodes = list(IntervalNode([]))
     #     self.assertListEqual([], nodes)
 
+    def test_from_sorted(self):
+        self.assertEqual(self.node, IntervalNode.from_sorted(make_intervals(0, 3, 9)))
+        self.assertEqual(IntervalNode([]), IntervalNode.from_sorted([]))
+
+        # large enough to be built from the coordinate arrays, with duplicates and intervals sharing the coordinates
+        intervals = sorted(make_intervals(0, 7, 300, step=3) + make_intervals(0, 50, 100, step=7)
+                           + [SimpleInterval(x, x + 3) for x in range(0, 600, 5)] + make_intervals(10, 20, 20, step=0))
+        node = IntervalNode.from_sorted(intervals)
+        expected = IntervalNode(intervals)
+        self.assertEqual(expected, node)
+        for position in range(0, 1000, 7):
+            self.assertListEqual(expected.search(position), node.search(position))
+        # the intervals with equal coordinates keep their order
+        self.assertListEqual([id(item) for item in expected.get_overlaps(10, 20)],
+                             [id(item) for item in node.get_overlaps(10, 20)])
+
+    def test_get_contained(self):
+        self.assertListEqual([SimpleInterval.of(3, 6), SimpleInterval.of(2, 5)], self.node.get_contained(2, 6))
+        self.assertListEqual([], self.node.get_contained(2, 4))
+        self.assertListEqual([], IntervalNode([]).get_contained(2, 4))
+
+    def test_get_enclosing(self):
+        self.assertListEqual([SimpleInterval.of(3, 6), SimpleInterval.of(4, 7)], self.node.get_enclosing(4, 6))
+        self.assertListEqual([], self.node.get_enclosing(2, 6))
+        # the queries before and after the center of the root
+        self.assertListEqual([SimpleInterval.of(2, 5), SimpleInterval.of(3, 6), SimpleInterval.of(4, 7)],
+                             sorted(self.node.get_enclosing(4, 5)))
+        self.assertListEqual([SimpleInterval.of(4, 7), SimpleInterval.of(5, 8), SimpleInterval.of(6, 9)],
+                             sorted(self.node.get_enclosing(6, 7)))
+        self.assertListEqual([], IntervalNode([]).get_enclosing(2, 4))
+
+    def test_node_without_own_intervals(self):
+        # the root has no intervals of its own, all intervals are in the children
+        node = IntervalNode([SimpleInterval.of(24, 26), SimpleInterval.of(27, 30)])
+        self.assertEqual(0, len(node))
+        self.assertTrue(node)
+        self.assertListEqual([SimpleInterval.of(27, 30)], node.search(28))
+        self.assertListEqual([SimpleInterval.of(24, 26), SimpleInterval.of(27, 30)], node.get_overlaps(20, 40))
+
     def test_get_coordinates(self):
         self.assertSetEqual({1, 2, 3, 4}, get_coordinates([SimpleInterval(1, 2), SimpleInterval(3, 4)]))
         self.assertSetEqual({1, 2, 3, 4, 5}, get_coordinates([SimpleInterval(1, 2),
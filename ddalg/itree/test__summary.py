@@ -0,0 +1,45 @@
+import unittest
+
+from ddalg.model.test__interval import make_intervals
+from ._node import IntervalNode
+from ._summary import AggregationIndex, Summary, REDUCERS
+
+
+class TestSummary(unittest.TestCase):
+
+    def test_of(self):
+        self.assertEqual(Summary(3, 6, 1, 3), Summary.of([2, 1, 3]))
+        self.assertEqual(Summary.empty(), Summary.of([]))
+
+    def test_combine(self):
+        self.assertEqual(Summary(4, 10, 1, 4), Summary.of([2, 1, 3]).combine(Summary.of([4])))
+        self.assertEqual(Summary.of([4]), Summary.empty().combine(Summary.of([4])))
+        self.assertEqual(Summary.of([4]), Summary.of([4]).combine(Summary.empty()))
+
+    def test_reducers(self):
+        summary = Summary.of([2, 1, 3])
+        self.assertListEqual([3, 6, 1, 3, 2.],
+                             [REDUCERS[name](summary) for name in ('count', 'sum', 'min', 'max', 'mean')])
+        self.assertListEqual([0, 0, None, None, None],
+                             [REDUCERS[name](Summary.empty()) for name in ('count', 'sum', 'min', 'max', 'mean')])
+
+
+class TestAggregationIndex(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.index = AggregationIndex(IntervalNode(make_intervals(0, 3, 9)))
+
+    def test_aggregate(self):
+        def payload(interval):
+            return interval.begin
+
+        self.assertEqual(Summary(4, 14, 2, 5), self.index.aggregate(4, 6, 'begin', payload))
+        # the summaries are reused by the subsequent queries
+        self.assertEqual(Summary(9, 36, 0, 8), self.index.aggregate(0, 12, 'begin', payload))
+        self.assertEqual(Summary.empty(), self.index.aggregate(11, 12, 'begin', payload))
+        self.assertEqual(Summary.empty(), AggregationIndex(IntervalNode([])).aggregate(0, 12, 'begin', payload))
+
+    def test_discard(self):
+        self.assertEqual(Summary(4, 14, 2, 5), self.index.aggregate(4, 6, 'payload', lambda interval: interval.begin))
+        self.index.discard('payload')
+        self.assertEqual(Summary(4, 26, 5, 8), self.index.aggregate(4, 6, 'payload', lambda interval: interval.end))
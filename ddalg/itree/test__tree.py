@@ -1,5 +1,7 @@
 import unittest
 
+import numpy as np
+
 from ddalg.model.test__interval import make_intervals
 from ._tree import IntervalTree, SimpleInterval
 
@@ -30,6 +32,41 @@ class TestIntervalTree(unittest.TestCase):
         # test error input
         self.assertRaises(ValueError, self.tree.search, 'BlaBla')
 
+    def test_search_sorted(self):
+        positions = [0, 1, 6, 6, 11, 12]
+        results = self.tree.search_sorted(positions)
+
+        self.assertEqual(len(positions), len(results))
+        for position, result in zip(positions, results):
+            self.assertListEqual(sorted(self.tree.search(position)), sorted(result))
+
+        self.assertListEqual([], IntervalTree([]).search_sorted([]))
+        self.assertListEqual([[]], IntervalTree([]).search_sorted([1]))
+
+        # test error input
+        self.assertRaises(ValueError, self.tree.search_sorted, [5, 1])
+
+    def test_get_overlaps_sorted(self):
+        queries = [(0, 1), (2, 12), (4, 6), (4, 5), (11, 12), (12, 20)]
+        results = self.tree.get_overlaps_sorted(queries)
+        for query, result in zip(queries, results):
+            self.assertListEqual(sorted(self.tree.get_overlaps(*query)), sorted(result))
+
+        self.assertListEqual([], IntervalTree([]).get_overlaps_sorted([]))
+        self.assertListEqual([[]], IntervalTree([]).get_overlaps_sorted([(0, 1)]))
+
+        # test error input
+        self.assertRaises(ValueError, self.tree.get_overlaps_sorted, [(5, 6), (1, 2)])
+
+    def test_search_sorted_after_insert(self):
+        # the position sorted intervals are created upon the first use and dropped on rebuild
+        self.assertIsNone(self.tree._sorted)
+        self.assertListEqual([[]], self.tree.search_sorted([12]))
+        self.assertIsNotNone(self.tree._sorted)
+
+        self.tree.insert(SimpleInterval(9, 12))
+        self.assertListEqual([[SimpleInterval(9, 12)]], self.tree.search_sorted([12]))
+
     def test_get_overlaps(self):
         self.assertEqual(0, len(self.tree.get_overlaps(-1, 0)))
 
@@ -49,6 +86,20 @@ class TestIntervalTree(unittest.TestCase):
 
         self.assertEqual(0, len(self.tree.get_overlaps(11, 12)))
 
+    def test_get_contained(self):
+        result = self.tree.get_contained(2, 7)
+        self.assertListEqual([SimpleInterval(2, 5), SimpleInterval(3, 6), SimpleInterval(4, 7)], sorted(result))
+
+        self.assertListEqual([], self.tree.get_contained(2, 4))
+        self.assertListEqual([], IntervalTree([]).get_contained(2, 4))
+
+    def test_get_enclosing(self):
+        result = self.tree.get_enclosing(4, 5)
+        self.assertListEqual([SimpleInterval(2, 5), SimpleInterval(3, 6), SimpleInterval(4, 7)], sorted(result))
+
+        self.assertListEqual([], self.tree.get_enclosing(2, 6))
+        self.assertListEqual([], IntervalTree([]).get_enclosing(2, 4))
+
     def test_len(self):
         self.assertEqual(0, len(IntervalTree([])))
         self.assertEqual(9, len(self.tree))
@@ -99,6 +150,142 @@ class TestIntervalTree(unittest.TestCase):
         # for i in tree:
         #     print("{:>25} - {:.2f}".format(str(i), jaccard_coefficient(i, query)))
 
+    def test_aggregate(self):
+        self.tree.add_payload('begin', lambda interval: interval.begin)
+
+        self.assertEqual(14, self.tree.aggregate(4, 6, 'begin'))
+        self.assertEqual(4, self.tree.aggregate(4, 6, 'begin', reducer='count'))
+        self.assertEqual(2, self.tree.aggregate(4, 6, 'begin', reducer='min'))
+        self.assertEqual(5, self.tree.aggregate(4, 6, 'begin', reducer='max'))
+        self.assertAlmostEqual(3.5, self.tree.aggregate(4, 6, 'begin', reducer='mean'), delta=1e-5)
+        self.assertIsNone(self.tree.aggregate(11, 12, 'begin', reducer='mean'))
+
+        # the payloads are kept when the tree is rebuilt
+        self.tree.insert(SimpleInterval(4, 5))
+        self.assertEqual(18, self.tree.aggregate(4, 6, 'begin'))
+
+        # the payload registered under an existing name replaces the previous payload
+        self.tree.add_payload('begin', lambda interval: 2 * interval.begin)
+        self.assertEqual(36, self.tree.aggregate(4, 6, 'begin'))
+
+        tree = IntervalTree(make_intervals(0, 3, 9), engine='linear')
+        tree.add_payload('begin', lambda interval: interval.begin)
+        self.assertEqual(14, tree.aggregate(4, 6, 'begin'))
+
+        # test error input
+        self.assertRaises(ValueError, self.tree.aggregate, 4, 6, 'begin', 'BlaBla')
+        self.assertRaises(ValueError, self.tree.aggregate, 4, 6, 'BlaBla')
+        self.assertRaises(ValueError, self.tree.add_payload, 'BlaBla', 1)
+
+    def test_max_depth(self):
+        self.assertEqual(3, self.tree.max_depth(0, 12))
+        self.assertEqual(1, self.tree.max_depth(0, 1))
+        self.assertEqual(0, self.tree.max_depth(11, 12))
+        np.testing.assert_array_equal([1, 3, 0], self.tree.max_depth_batch([0, 4, 11], [1, 6, 12]))
+
+        self.tree.insert(SimpleInterval(4, 7))
+        self.assertEqual(4, self.tree.max_depth(0, 12))
+        self.assertEqual(0, IntervalTree([]).max_depth(0, 12))
+
+    def test_get_best_matches(self):
+        tree = IntervalTree(make_intervals(-20, 80, 11, step=5))
+
+        results = tree.get_best_matches(-5, 100, k=2)
+        # ties are broken by the interval order
+        self.assertListEqual([SimpleInterval(-5, 95), SimpleInterval(0, 100)], [item for item, _ in results])
+        self.assertAlmostEqual(100 / 105, results[0][1], delta=1e-5)
+        self.assertAlmostEqual(100 / 105, results[1][1], delta=1e-5)
+
+        results = tree.get_best_matches(0, 100, k=3, metric='reciprocal')
+        self.assertListEqual([SimpleInterval(0, 100), SimpleInterval(-5, 95), SimpleInterval(5, 105)],
+                             [item for item, _ in results])
+        self.assertListEqual([1., .95, .95], [score for _, score in results])
+
+        self.assertListEqual([], tree.get_best_matches(200, 300))
+
+        # fewer than `k` intervals overlap with the query
+        tree = IntervalTree(make_intervals(0, 3, 1000, step=5) + [SimpleInterval(4990, 5100)])
+        results = tree.get_best_matches(5000, 5010, k=10)
+        self.assertListEqual([SimpleInterval(4990, 5100)], [item for item, _ in results])
+        self.assertAlmostEqual(10 / 110, results[0][1], delta=1e-5)
+        self.assertListEqual([], IntervalTree([]).get_best_matches(0, 1))
+
+        # test error input
+        self.assertRaises(ValueError, tree.get_best_matches, 0, 100, 1, 'BlaBla')
+        self.assertRaises(ValueError, tree.get_best_matches, 0, 100, 0)
+        self.assertRaises(ValueError, tree.get_best_matches, 100, 0)
+
+    def test_get_binned_counts(self):
+        counts, edges = self.tree.get_binned_counts(0, 12, 4)
+        np.testing.assert_array_equal([0, 4, 8, 12], edges)
+        np.testing.assert_array_equal([4, 6, 3], counts)
+
+        counts, _ = self.tree.get_binned_counts(0, 12, 4, weight=lambda interval: interval.begin)
+        np.testing.assert_array_almost_equal([6., 27., 21.], counts)
+
+    def test_get_binned_counts_after_insert(self):
+        # the coordinate arrays are reused by the subsequent queries and dropped on rebuild
+        self.tree.get_binned_counts(0, 12, 4)
+        arrays = self.tree._arrays
+        self.tree.get_binned_coverage(0, 12, 4)
+        self.assertIs(arrays, self.tree._arrays)
+
+        self.tree.insert(SimpleInterval(9, 12))
+        counts, _ = self.tree.get_binned_counts(0, 12, 4)
+        np.testing.assert_array_equal([4, 6, 4], counts)
+
+    def test_get_binned_coverage(self):
+        bases, _ = self.tree.get_binned_coverage(0, 12, 4)
+        np.testing.assert_array_almost_equal([9., 12., 6.], bases)
+
+    def test_merge(self):
+        first = IntervalTree(make_intervals(0, 3, 5))
+        second = IntervalTree(make_intervals(5, 8, 4) + [SimpleInterval(2, 5)])
+        merged = IntervalTree.merge([first, second])
+
+        expected = IntervalTree(make_intervals(0, 3, 5) + make_intervals(5, 8, 4) + [SimpleInterval(2, 5)])
+        self.assertEqual(10, len(merged))
+        self.assertListEqual(list(expected), list(merged))
+        for position in range(13):
+            self.assertListEqual(expected.search(position), merged.search(position))
+        self.assertListEqual(expected.get_overlaps(4, 6), merged.get_overlaps(4, 6))
+
+        # trees large enough to be built from the coordinate arrays
+        first, second = IntervalTree(make_intervals(0, 20, 200, step=3)), IntervalTree(make_intervals(1, 9, 300))
+        merged = IntervalTree.merge([first, second])
+        expected = IntervalTree(make_intervals(0, 20, 200, step=3) + make_intervals(1, 9, 300))
+        self.assertListEqual(list(expected), list(merged))
+        self.assertListEqual(expected.get_overlaps(100, 130), merged.get_overlaps(100, 130))
+
+        # the merged tree is rebuilt after insert
+        merged.insert(SimpleInterval(1000, 1001))
+        self.assertListEqual([SimpleInterval(1000, 1001)], merged.search(1001))
+
+        self.assertEqual('sorted', IntervalTree.merge([first, second], engine='sorted').engine)
+        self.assertEqual(0, len(IntervalTree.merge([])))
+
+    def test_engine(self):
+        self.assertEqual('tree', self.tree.engine)
+        self.assertEqual('linear', IntervalTree(make_intervals(0, 3, 9), engine='linear').engine)
+
+        tree = IntervalTree(make_intervals(0, 3, 9), engine='auto')
+        self.assertEqual('linear', tree.engine)
+        self.assertIn('9 intervals', tree.engine_rationale)
+        self.assertListEqual(sorted(self.tree.get_overlaps(4, 6)), sorted(tree.get_overlaps(4, 6)))
+        self.assertListEqual(list(self.tree), list(tree))
+
+        # test error input
+        self.assertRaises(ValueError, IntervalTree, [], 'BlaBla')
+        self.assertRaises(ValueError, IntervalTree, [], object())
+
+    def test_tune(self):
+        engine = self.tree.tune([1, 6, (4, 6), (10, 11)])
+        self.assertEqual(engine, self.tree.engine)
+        self.assertIn('4 observed queries', self.tree.engine_rationale)
+
+        result = self.tree.search(6)
+        self.assertListEqual([SimpleInterval(3, 6), SimpleInterval(4, 7), SimpleInterval(5, 8)], sorted(result))
+
     def test_bool(self):
         self.assertTrue(self.tree)  # tree with at least one element is true
         self.assertFalse(IntervalTree([]))  # empty tree is False
@@ -119,6 +306,10 @@ class TestIntervalTree(unittest.TestCase):
                               SimpleInterval(8, 11)],
                              items)
 
+    def test_iteration_through_node_without_own_intervals(self):
+        tree = IntervalTree([SimpleInterval(27, 30), SimpleInterval(24, 26)])
+        self.assertListEqual([SimpleInterval(24, 26), SimpleInterval(27, 30)], list(tree))
+
     def test_iteration_through_empty_tree(self):
         tree = IntervalTree([])
         items = list(tree)